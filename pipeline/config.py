@@ -22,6 +22,13 @@ RESOLUTION_LST  = 30   # Landsat 8/9 （LST）
 # ── 指標定義 ─────────────────────────────────────────────
 INDICATORS = ["ndvi", "evi", "ndwi", "lst"]
 
+# センサー（STAC コレクション）別の指標グループ。
+# 同一グループの指標は 1 回の odc.stac.load を共有する
+SENSOR_INDICATORS = {
+    "sentinel-2-l2a": ["ndvi", "evi", "ndwi"],
+    "landsat-c2-l2":  ["lst"],
+}
+
 SENTINEL2_BANDS = ["red", "nir", "blue", "swir16", "SCL"]
 LANDSAT_BANDS   = ["lwir11", "qa_pixel"]
 
@@ -36,6 +43,8 @@ LST_KELVIN_OFFSET = 273.15
 # ── 出力ディレクトリ ─────────────────────────────────────
 OUTPUT_DIR  = os.environ.get("OUTPUT_DIR", "output")
 MISSING_LOG = os.path.join(OUTPUT_DIR, "missing.json")
+# 実行中に 1 行ずつ追記するクラッシュセーフな欠損ログ（終了時に集約）
+MISSING_LOG_JSONL = os.path.join(OUTPUT_DIR, "missing.jsonl")
 
 # ── GitHub ───────────────────────────────────────────────
 GITHUB_REPO   = os.environ.get("GITHUB_REPO", "")    # "owner/repo" 形式
@@ -15,14 +15,15 @@ if str(_project_root) not in sys.path:
     sys.path.insert(0, str(_project_root))
 
 import argparse
-import json
 import logging
 import pathlib
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
 
 import time
 
+import orjson
 import xarray as xr
 from tenacity import before_sleep_log, retry, stop_after_attempt, wait_exponential
 
@@ -35,8 +36,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# ジョブ実行中に蓄積する欠損レコード（ジョブ開始時にリセット）
-_missing_records: list[dict] = []
+# ジョブ実行中に蓄積する欠損レコード。(year, month, indicator) キーで
+# 重複記録を 1 件にまとめる（ジョブ開始時にリセット）
+_missing_records: dict[tuple[int, int, str], dict] = {}
 
 
 def month_range(
@@ -60,7 +62,10 @@ def record_missing(
     indicator: str,
     reason: str = "unknown",
 ) -> None:
-    """欠損を _missing_records に追記し、output/missing.json を上書き保存する。
+    """欠損を _missing_records に追記し、missing.jsonl に 1 行追記する。
+
+    毎回 missing.json 全体を書き直すと件数の 2 乗の I/O になるため、
+    実行中は追記専用の JSONL に記録し、終了時に missing.json へ集約する。
 
     reason の種類:
         no_items        STACアイテムが0件
@@ -68,31 +73,33 @@ def record_missing(
         process_error   計算中に予期しないエラー
         upload_error    アップロード失敗
     """
-    _missing_records.append({
+    record = {
         "year": year,
         "month": month,
         "indicator": indicator,
         "reason": reason,
-    })
-    out_path = pathlib.Path(config.MISSING_LOG)
+    }
+    _missing_records[(year, month, indicator)] = record
+    out_path = pathlib.Path(config.MISSING_LOG_JSONL)
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    out_path.write_text(
-        json.dumps(_missing_records, indent=2, ensure_ascii=False),
-        encoding="utf-8",
-    )
+    with open(out_path, "ab") as f:
+        f.write(orjson.dumps(record) + b"\n")
 
 
 def process_one_month(
     year: int,
     month: int,
-    indicator: str,
-) -> xr.DataArray | None:
-    """1ヶ月分・1指標のデータを取得・計算する。tenacity でリトライ付き。
+    datetime_range: str,
+    collection: str,
+    indicators: list[str],
+) -> dict[str, xr.DataArray | None]:
+    """1ヶ月分・1センサーの全指標を取得・計算する。tenacity でリトライ付き。
+
+    同一センサーの指標は 1 回の STAC 検索・1 回のロードを共有する。
 
     Returns:
-        成功時は DataArray（shape: y, x）、失敗時は None
+        指標名 → DataArray（shape: y, x）。失敗した指標は None
     """
-    collection = "landsat-c2-l2" if indicator == "lst" else "sentinel-2-l2a"
 
     @retry(
         stop=stop_after_attempt(config.RETRY_ATTEMPTS),
@@ -100,23 +107,23 @@ def process_one_month(
         before_sleep=before_sleep_log(logger, logging.WARNING),
         reraise=True,
     )
-    def _inner() -> xr.DataArray | None:
-        items = query.search_items(collection, year, month)
+    def _inner() -> dict[str, xr.DataArray | None]:
+        items = query.search_items(collection, datetime_range)
         if not items:
-            return None
-        return process.load_and_compute(items, indicator, year, month)
+            return {indicator: None for indicator in indicators}
+        return process.load_and_compute_batch(items, indicators, year, month)
 
     try:
         return _inner()
     except Exception as exc:
         logger.error(
             "[main] %s %d-%02d: all retries failed: %s",
-            indicator,
+            collection,
             year,
             month,
             exc,
         )
-        return None
+        return {indicator: None for indicator in indicators}
 
 
 def _parse_args() -> argparse.Namespace:
@@ -154,22 +161,72 @@ def main() -> None:
     start = _parse_ym(args.start)
     end = _parse_ym(args.end)
 
-    months = list(month_range(start, end))
+    # 月境界の計算は指標・センサーをまたいで同一のため、ループ前に一括生成する
+    months = [
+        (y, m, query.month_datetime_range(y, m))
+        for y, m in month_range(start, end)
+    ]
     success_count = 0
     missing_count = 0
+    skipped_count = 0
+
+    # 欠損記録はジョブ単位のため、前回実行の JSONL をリセットする
+    jsonl_path = pathlib.Path(config.MISSING_LOG_JSONL)
+    if jsonl_path.exists():
+        jsonl_path.unlink()
+
+    for year, month, datetime_range in months:
+        # 出力済み COG がある指標はスキップ（中断したバックフィルの再開用）。
+        # monthly モードでは前回出力が存在しないため全指標が対象になる
+        pending = [
+            indicator
+            for indicator in config.INDICATORS
+            if not (
+                (p := export.cog_path(indicator, year, month)).exists()
+                and p.stat().st_size > 0
+            )
+        ]
+        if not pending:
+            logger.info("[main] %d-%02d: already processed, skipping", year, month)
+            skipped_count += len(config.INDICATORS)
+            continue
+
+        # 取得・計算は STAC 検索 + COG ダウンロードの I/O が支配的なため、
+        # センサー単位で並列実行する（S2 の 1 ロードを NDVI/EVI/NDWI で共有
+        # するので指標単位ではなくセンサー単位）。export / upload（サマリー
+        # JSONL 追記や missing.json 書き込みを含む）は書き込み競合を避けて
+        # 逐次のまま
+        sensor_groups = {
+            collection: [i for i in indicators if i in pending]
+            for collection, indicators in config.SENSOR_INDICATORS.items()
+        }
+        sensor_groups = {c: inds for c, inds in sensor_groups.items() if inds}
+        skipped_count += len(config.INDICATORS) - len(pending)
+
+        with ThreadPoolExecutor(max_workers=len(sensor_groups)) as executor:
+            futures = [
+                executor.submit(
+                    process_one_month, year, month, datetime_range, collection, indicators
+                )
+                for collection, indicators in sensor_groups.items()
+            ]
 
-    for year, month in months:
-        for indicator in config.INDICATORS:
-            result = process_one_month(year, month, indicator)
+        results: dict[str, xr.DataArray | None] = {}
+        for future in futures:
+            results.update(future.result())
+
+        # COG 書き出し + サマリー更新（ローカル書き込みのため逐次）
+        cog_paths: dict[str, pathlib.Path] = {}
+        for indicator in pending:
+            result = results[indicator]
 
             if result is None:
                 record_missing(year, month, indicator, "no_items")
                 missing_count += 1
                 continue
 
-            # COG 書き出し + サマリー更新
             try:
-                cog_path = export.save_cog(result, indicator, year, month)
+                cog_paths[indicator] = export.save_cog(result, indicator, year, month)
                 export.update_summary(result, indicator, year, month)
             except Exception as exc:
                 logger.error(
@@ -179,17 +236,29 @@ def main() -> None:
                     month,
                     exc,
                 )
+                cog_paths.pop(indicator, None)
                 record_missing(year, month, indicator, "process_error")
                 missing_count += 1
-                continue
 
-            # GitHub Releases アップロード（GITHUB_REPO が設定されている場合のみ）
-            if config.GITHUB_REPO:
+        # GitHub Releases アップロード（GITHUB_REPO が設定されている場合のみ）。
+        # HTTP PUT はネットワーク律速のため指標単位で並列実行する
+        if config.GITHUB_REPO and cog_paths:
+
+            def _upload_one(indicator: str) -> None:
+                tag = f"data-{indicator}-{year}"
+                upload.ensure_release(tag, f"{indicator.upper()} {year}")
+                upload.upload_asset(tag, cog_paths[indicator])
+
+            with ThreadPoolExecutor(max_workers=len(cog_paths)) as executor:
+                upload_futures = {
+                    indicator: executor.submit(_upload_one, indicator)
+                    for indicator in cog_paths
+                }
+
+            for indicator, future in upload_futures.items():
                 try:
-                    tag = f"data-{indicator}-{year}"
-                    title = f"{indicator.upper()} {year}"
-                    upload.ensure_release(tag, title)
-                    upload.upload_asset(tag, cog_path)
+                    future.result()
+                    success_count += 1
                 except Exception as exc:
                     logger.error(
                         "[main] upload failed %s %d-%02d: %s",
@@ -200,28 +269,38 @@ def main() -> None:
                     )
                     record_missing(year, month, indicator, "upload_error")
                     missing_count += 1
-                    continue
-
-            success_count += 1
+        else:
+            success_count += len(cog_paths)
 
-        # 月ループ終了後にサマリーをアップロード
+        # 月ループ終了後にサマリーを確定してアップロード（指標単位で並列）
         if config.GITHUB_REPO:
             for indicator in config.INDICATORS:
-                upload.upload_summary(indicator)
+                export.flush_summary(indicator)
+            # data-summary リリースの並行作成で 422 にならないよう先に 1 回作る
+            upload.ensure_release("data-summary", "Summary Data")
+            with ThreadPoolExecutor(max_workers=len(config.INDICATORS)) as executor:
+                list(executor.map(upload.upload_summary, config.INDICATORS))
 
         # PC API レート制限対策：月ループ間に短時間スリープ
         time.sleep(config.INTER_MONTH_SLEEP)
 
-    # 欠損ファイルが未作成（欠損 0 件）の場合も空配列で作成する
+    # GITHUB_REPO 未設定のローカル実行でもサマリー CSV/JSON を確定する
+    for indicator in config.INDICATORS:
+        export.flush_summary(indicator)
+
+    # 実行中に蓄積した欠損を missing.json へ集約する（0 件でも空配列で作成）
     out_path = pathlib.Path(config.MISSING_LOG)
-    if not out_path.exists():
-        out_path.parent.mkdir(parents=True, exist_ok=True)
-        out_path.write_text("[]", encoding="utf-8")
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_bytes(
+        orjson.dumps(list(_missing_records.values()), option=orjson.OPT_INDENT_2)
+    )
 
     # 終了サマリーログ
     logger.info("[main] ===== 処理完了 =====")
     logger.info("[main] 処理月数：%d", len(months))
     logger.info("[main] 成功：%d", success_count)
+    if skipped_count > 0:
+        logger.info("[main] スキップ（出力済み）：%d", skipped_count)
     if missing_count > 0:
         logger.warning("[main] 欠損：%d  → %s を参照", missing_count, config.MISSING_LOG)
     else:
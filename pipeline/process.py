@@ -1,5 +1,8 @@
 import logging
 
+import dask
+import dask.config
+import numba
 import numpy as np
 import odc.stac
 import pystac
@@ -9,6 +12,14 @@ from pipeline import config
 
 logger = logging.getLogger(__name__)
 
+# 複数の指標式から参照される共有バンドのタスクを 1 つに融合させる
+dask.config.set({"optimization.fuse.active": True})
+
+# SCL 有効クラス（4..7）は連番のため、要素ごとの集合照合になる isin ではなく
+# ベクトル化される範囲比較でマスクする
+_SCL_VALID_MIN = min(config.SCL_VALID_CLASSES)
+_SCL_VALID_MAX = max(config.SCL_VALID_CLASSES)
+
 
 def load_and_compute(
     items: list[pystac.Item],
@@ -30,18 +41,170 @@ def load_and_compute(
     Raises:
         各種処理エラー（呼び出し元の tenacity でリトライ）
     """
-    if indicator in ("ndvi", "evi", "ndwi"):
-        return _compute_sentinel2(items, indicator, year, month)
-    else:
-        return _compute_lst(items, year, month)
+    return load_and_compute_batch(items, [indicator], year, month)[indicator]
 
 
-def _compute_sentinel2(
+def load_and_compute_batch(
     items: list[pystac.Item],
-    indicator: str,
+    indicators: list[str],
     year: int,
     month: int,
-) -> xr.DataArray | None:
+) -> dict[str, xr.DataArray | None]:
+    """同一センサーの複数指標を、1 回のロードを共有して一括計算する。
+
+    Sentinel-2 系（ndvi/evi/ndwi）はバンドが共通のため、指標ごとに
+    odc.stac.load し直すと同じタイルを 3 回取得・展開することになる。
+    1 回のロード・1 回のマスクを共有し、全指標を 1 つの Dask グラフで計算する。
+
+    Args:
+        items: pystac.Item のリスト（1件以上、単一コレクション）
+        indicators: 計算する指標名のリスト（同一センサーに属すること）
+        year: 対象年
+        month: 対象月
+
+    Returns:
+        指標名 → 月次中央値 DataArray（有効ピクセルゼロの指標は None）
+
+    Raises:
+        各種処理エラー（呼び出し元の tenacity でリトライ）
+    """
+    s2_indicators = [i for i in indicators if i in ("ndvi", "evi", "ndwi")]
+
+    results: dict[str, xr.DataArray | None] = {}
+    if s2_indicators:
+        results.update(_compute_sentinel2_batch(items, s2_indicators, year, month))
+    if "lst" in indicators:
+        results["lst"] = _compute_lst(items, year, month)
+    return results
+
+
+# parallel=True は使わない：チャンク間の並列化は Dask のスレッドスケジューラが
+# 担っており、prange はコアを二重に食い合うだけでなく、numba のスレッディング
+# レイヤの後始末がワーカースレッド起動のカーネルと衝突してプロセス終了時に
+# ハングする
+@numba.njit(fastmath=True, cache=True)
+def _s2_indices_kernel(
+    red: np.ndarray,
+    nir: np.ndarray,
+    blue: np.ndarray,
+    swir: np.ndarray,
+    valid: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """uint16 バンドから NDVI/EVI/NDWI を 1 パスで計算する融合カーネル。
+
+    xarray 式のままだと減算・加算・除算・マスクが個別の Dask タスクになり、
+    チャンクごとに中間配列を確保して帯域を浪費する。ここでスケール変換
+    （uint16 → float32、1/10000）とマスクも含めて 1 ループに融合する。
+
+    Args:
+        red/nir/blue/swir: 反射率バンド（uint16 DN 値）
+        valid: SCL マスク（True = 有効ピクセル）
+
+    Returns:
+        (ndvi, evi, ndwi) の float32 配列タプル
+    """
+    r = red.ravel()
+    n = nir.ravel()
+    b = blue.ravel()
+    s = swir.ravel()
+    v = valid.ravel()
+
+    ndvi = np.empty(r.size, dtype=np.float32)
+    evi = np.empty(r.size, dtype=np.float32)
+    ndwi = np.empty(r.size, dtype=np.float32)
+
+    scale = np.float32(1.0 / 10000.0)
+    nan = np.float32(np.nan)
+
+    for i in range(r.size):
+        if v[i]:
+            rf = np.float32(r[i]) * scale
+            nf = np.float32(n[i]) * scale
+            bf = np.float32(b[i]) * scale
+            sf = np.float32(s[i]) * scale
+            ndvi[i] = (nf - rf) / (nf + rf)
+            evi[i] = (
+                np.float32(2.5) * (nf - rf)
+                / (nf + np.float32(6.0) * rf - np.float32(7.5) * bf + np.float32(1.0))
+            )
+            ndwi[i] = (nf - sf) / (nf + sf)
+        else:
+            ndvi[i] = nan
+            evi[i] = nan
+            ndwi[i] = nan
+
+    shape = red.shape
+    return ndvi.reshape(shape), evi.reshape(shape), ndwi.reshape(shape)
+
+
+# LST 変換係数は import 時に 1 つの加算定数へ畳み込む
+_LST_SCALE = np.float32(config.LST_SCALE)
+_LST_SHIFT = np.float32(config.LST_OFFSET - config.LST_KELVIN_OFFSET)
+_QA_CLOUD_BITS = np.uint16(0b0000_1010)  # bit 1 = 雲（dilated）、bit 3 = 雲影
+
+
+# parallel=True は使わない（理由は _s2_indices_kernel と同じ。こちらは
+# main() のセンサー並列スレッドから S2 カーネルと同時に呼ばれもする）
+@numba.njit(fastmath=True, cache=True)
+def _lst_kernel(lwir: np.ndarray, qa: np.ndarray) -> np.ndarray:
+    """QA マスク・nodata 除外・摂氏変換を 1 パスに融合した LST カーネル。
+
+    xarray 式のままだとビット演算・比較・where・スケール変換が個別の
+    Dask タスクになり 4 回配列を走査する。ここで 1 ループにまとめる。
+
+    Args:
+        lwir: lwir11 バンド（uint16 DN 値、0 は nodata）
+        qa: qa_pixel バンド（uint16 ビットフラグ）
+
+    Returns:
+        摂氏 LST の float32 配列（マスク対象は NaN）
+    """
+    lw = lwir.ravel()
+    q = qa.ravel()
+    out = np.empty(lw.size, dtype=np.float32)
+    nan = np.float32(np.nan)
+
+    for i in range(lw.size):
+        if (q[i] & _QA_CLOUD_BITS) == 0 and lw[i] != 0:
+            out[i] = np.float32(lw[i]) * _LST_SCALE + _LST_SHIFT
+        else:
+            out[i] = nan
+
+    return out.reshape(lwir.shape)
+
+
+def _monthly_median(obj):
+    """time 次元の中央値合成（検索範囲が単月のため resample は不要）。
+
+    dask.array の median は全タイムステップをグローバルに rechunk して
+    実体化するため、タイル単位の np.nanmedian を apply_ufunc で適用する。
+    入出力の空間チャンクは維持される。
+
+    Args:
+        obj: time 次元を持つ DataArray または Dataset
+
+    Returns:
+        time 次元を縮約した同型オブジェクト（dtype: float32）
+    """
+    if obj.chunksizes:
+        # コア次元（time）はチャンク分割不可のため 1 チャンクにまとめる
+        obj = obj.chunk({"time": -1})
+    return xr.apply_ufunc(
+        np.nanmedian,
+        obj,
+        input_core_dims=[["time"]],
+        kwargs={"axis": -1},
+        dask="parallelized",
+        output_dtypes=[np.float32],
+    )
+
+
+def _compute_sentinel2_batch(
+    items: list[pystac.Item],
+    indicators: list[str],
+    year: int,
+    month: int,
+) -> dict[str, xr.DataArray | None]:
     ds = odc.stac.load(
         items,
         bands=config.SENTINEL2_BANDS,
@@ -54,28 +217,39 @@ def _compute_sentinel2(
         nodata=0,
     )
 
-    # SCL マスク：有効クラス以外を NaN 化
-    valid = ds.SCL.isin(config.SCL_VALID_CLASSES)
+    # SCL マスク：有効クラス以外を NaN 化（範囲比較で分岐なし SIMD 化）
+    valid = (ds.SCL >= _SCL_VALID_MIN) & (ds.SCL <= _SCL_VALID_MAX)
 
-    # スケール変換（uint16 → float32、反射率 0〜1 に正規化）
-    red  = ds.red.where(valid).astype("float32") / 10000.0
-    nir  = ds.nir.where(valid).astype("float32") / 10000.0
-    blue = ds.blue.where(valid).astype("float32") / 10000.0
-    swir = ds.swir16.where(valid).astype("float32") / 10000.0
+    # マスク・スケール変換・3 指標の算術を numba カーネルに融合し、
+    # uint16 バンドを 1 パス読むだけで全指標を得る
+    ndvi, evi, ndwi = xr.apply_ufunc(
+        _s2_indices_kernel,
+        ds.red,
+        ds.nir,
+        ds.blue,
+        ds.swir16,
+        valid,
+        output_core_dims=[[], [], []],
+        dask="parallelized",
+        output_dtypes=[np.float32, np.float32, np.float32],
+    )
 
-    # 指標計算
-    if indicator == "ndvi":
-        index_da = (nir - red) / (nir + red)
-    elif indicator == "evi":
-        index_da = 2.5 * (nir - red) / (nir + 6.0 * red - 7.5 * blue + 1.0)
-    elif indicator == "ndwi":
-        index_da = (nir - swir) / (nir + swir)
+    index_vars: dict[str, xr.DataArray] = {}
+    if "ndvi" in indicators:
+        index_vars["ndvi"] = ndvi
+    if "evi" in indicators:
+        index_vars["evi"] = evi
+    if "ndwi" in indicators:
+        index_vars["ndwi"] = ndwi
 
-    # 月次中央値合成（.compute() で Dask グラフを実体化）
-    da = index_da.resample(time="MS").median().compute()
-    da = da.isel(time=0)
+    # 月次中央値合成。全指標を 1 つの Dataset にまとめて 1 回だけ
+    # .compute() することで、Dask が共有バンドのグラフを融合する
+    monthly = _monthly_median(xr.Dataset(index_vars)).compute()
 
-    return _check_valid(da, indicator, year, month)
+    return {
+        indicator: _check_valid(monthly[indicator], indicator, year, month)
+        for indicator in indicators
+    }
 
 
 def _compute_lst(
@@ -95,18 +269,17 @@ def _compute_lst(
         nodata=0,
     )
 
-    # QA_PIXEL マスク：bit 1 = 雲（dilated）、bit 3 = 雲影 をマスク
-    cloud_mask = (ds.qa_pixel & 0b0000_1010) == 0
-
-    # nodata=0 のピクセルも除外（lwir11=0 は欠損値）
-    lwir = ds.lwir11.where(cloud_mask & (ds.lwir11 != 0)).astype("float32")
-
-    # Kelvin → 摂氏変換
-    lst_celsius = lwir * config.LST_SCALE + config.LST_OFFSET - config.LST_KELVIN_OFFSET
+    # QA_PIXEL マスク（雲・雲影）・nodata=0 除外・摂氏変換を融合カーネルで一括適用
+    lst_celsius = xr.apply_ufunc(
+        _lst_kernel,
+        ds.lwir11,
+        ds.qa_pixel,
+        dask="parallelized",
+        output_dtypes=[np.float32],
+    )
 
     # 月次中央値合成
-    da = lst_celsius.resample(time="MS").median().compute()
-    da = da.isel(time=0)
+    da = _monthly_median(lst_celsius).compute()
 
     return _check_valid(da, "lst", year, month)
 
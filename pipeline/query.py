@@ -1,6 +1,12 @@
 import calendar
+import functools
+import hashlib
+import json
 import logging
+import pathlib
+from datetime import date
 
+import orjson
 import planetary_computer
 import pystac
 import pystac_client
@@ -10,13 +16,50 @@ from pipeline import config
 logger = logging.getLogger(__name__)
 
 
-def search_items(collection: str, year: int, month: int) -> list[pystac.Item]:
+@functools.lru_cache(maxsize=1)
+def _catalog() -> pystac_client.Client:
+    """STAC クライアントをプロセス内で 1 つだけ生成して使い回す。
+
+    Client.open はルートカタログの GET と TLS ハンドシェイクを伴うため、
+    検索のたびに生成するとバックフィル全体で数百回の無駄な往復になる。
+    """
+    return pystac_client.Client.open(
+        config.STAC_URL,
+        modifier=planetary_computer.sign_inplace,
+    )
+
+
+def month_datetime_range(year: int, month: int) -> str:
+    """STAC 検索用の月初〜月末（両端を含む）の datetime 文字列を生成する。"""
+    last_day = calendar.monthrange(year, month)[1]
+    return f"{year}-{month:02d}-01/{year}-{month:02d}-{last_day:02d}"
+
+
+def _cache_path(collection: str, datetime_range: str) -> pathlib.Path:
+    """検索条件（collection, 期間, bbox, 雲量上限）から一意なキャッシュパスを返す。"""
+    key = json.dumps(
+        [collection, datetime_range, config.BBOX, config.CLOUD_COVER_MAX]
+    )
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    return (
+        pathlib.Path(config.OUTPUT_DIR)
+        / ".stac_cache"
+        / f"{collection}_{digest}.json"
+    )
+
+
+def search_items(collection: str, datetime_range: str) -> list[pystac.Item]:
     """STAC API を検索してアイテムリストを返す。
 
+    過去月の検索結果は決定的なため、ディスクにキャッシュして再実行時の
+    再検索を省く（中断したバックフィルの再開がほぼ即時になる）。署名 URL
+    （SAS トークン）は失効するため、キャッシュヒット時は再署名する。
+    当月など進行中の期間はアイテムが増えうるのでキャッシュしない。
+
     Args:
         collection: "sentinel-2-l2a" または "landsat-c2-l2"
-        year: 対象年
-        month: 対象月
+        datetime_range: month_datetime_range で生成した検索範囲
+            （呼び出し元で月ごとに 1 回だけ計算して使い回す）
 
     Returns:
         pystac.Item のリスト（0件の場合は空リスト）
@@ -24,28 +67,41 @@ def search_items(collection: str, year: int, month: int) -> list[pystac.Item]:
     Raises:
         各種ネットワーク・API エラー（呼び出し元の tenacity でリトライ）
     """
-    last_day = calendar.monthrange(year, month)[1]
-    datetime_range = f"{year}-{month:02d}-01/{year}-{month:02d}-{last_day:02d}"
+    cacheable = date.fromisoformat(datetime_range.split("/")[1]) < date.today()
+    cache_path = _cache_path(collection, datetime_range)
 
-    catalog = pystac_client.Client.open(
-        config.STAC_URL,
-        modifier=planetary_computer.sign_inplace,
-    )
-    search = catalog.search(
+    if cacheable and cache_path.exists():
+        item_dicts = orjson.loads(cache_path.read_bytes())
+        items = [
+            planetary_computer.sign(pystac.Item.from_dict(d)) for d in item_dicts
+        ]
+        logger.info(
+            "[query] %s %s: %d items (cache)", collection, datetime_range, len(items)
+        )
+        return items
+
+    search = _catalog().search(
         collections=[collection],
         bbox=config.BBOX,
         datetime=datetime_range,
         query={"eo:cloud_cover": {"lt": config.CLOUD_COVER_MAX}},
+        limit=500,  # ページを大きくして HTTP ラウンドトリップ数を減らす
     )
-    items = list(search.items())
+    # items() のページ逐次取得ではなく item_collection() で一括取得する
+    items = list(search.item_collection())
+
+    if cacheable:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_bytes(
+            orjson.dumps([item.to_dict() for item in items])
+        )
 
     level = logging.WARNING if not items else logging.INFO
     logger.log(
         level,
-        "[query] %s %d-%02d: %d items found",
+        "[query] %s %s: %d items found",
         collection,
-        year,
-        month,
+        datetime_range,
         len(items),
     )
     return items
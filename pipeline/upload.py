@@ -1,21 +1,48 @@
 import logging
 import pathlib
-import subprocess
+
+import requests
 
 from pipeline import config
 
 logger = logging.getLogger(__name__)
 
+_API_BASE = "https://api.github.com"
+_UPLOADS_BASE = "https://uploads.github.com"
+
+# 全リクエストで TLS 接続（keep-alive）を使い回す共有セッション。
+# gh CLI の fork+exec + 認証ハンドシェイクを毎回払うのを避ける
+_session = requests.Session()
+_session.headers.update({
+    "Accept": "application/vnd.github+json",
+    "X-GitHub-Api-Version": "2022-11-28",
+})
+if config.GITHUB_TOKEN:
+    _session.headers["Authorization"] = f"Bearer {config.GITHUB_TOKEN}"
+
+
+def _request(method: str, url: str, **kwargs) -> requests.Response:
+    """GitHub API を呼び出し、失敗時は RuntimeError を送出する。"""
+    resp = _session.request(method, url, **kwargs)
+    if resp.status_code >= 400:
+        raise RuntimeError(
+            f"{method} {url} failed: {resp.status_code} {resp.text[:200]}"
+        )
+    return resp
+
 
-def _run_gh(args: list[str]) -> subprocess.CompletedProcess:
-    """gh CLI を実行し、失敗時は RuntimeError を送出する。"""
-    cmd = ["gh"] + args
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode != 0:
+def _get_release(tag: str) -> dict | None:
+    """指定タグの Release 情報を返す。存在しない場合は None。"""
+    resp = _session.get(
+        f"{_API_BASE}/repos/{config.GITHUB_REPO}/releases/tags/{tag}"
+    )
+    if resp.status_code == 404:
+        return None
+    if resp.status_code >= 400:
         raise RuntimeError(
-            f"gh {' '.join(args)} failed: {result.stderr.strip()}"
+            f"GET release {tag} failed: {resp.status_code} {resp.text[:200]}"
         )
-    return result
+    return resp.json()
 
 
 def ensure_release(tag: str, title: str) -> None:
@@ -28,16 +55,12 @@ def ensure_release(tag: str, title: str) -> None:
     if not config.GITHUB_REPO:
         logger.warning("[upload] GITHUB_REPO not set, skipping ensure_release(%s)", tag)
         return
-    try:
-        _run_gh(["release", "view", tag, "--repo", config.GITHUB_REPO])
-    except RuntimeError:
-        # Release does not exist; create it
-        _run_gh([
-            "release", "create", tag,
-            "--title", title,
-            "--notes", "",
-            "--repo", config.GITHUB_REPO,
-        ])
+    if _get_release(tag) is None:
+        _request(
+            "POST",
+            f"{_API_BASE}/repos/{config.GITHUB_REPO}/releases",
+            json={"tag_name": tag, "name": title, "body": ""},
+        )
 
 
 def upload_asset(tag: str, file_path: pathlib.Path) -> None:
@@ -57,20 +80,28 @@ def upload_asset(tag: str, file_path: pathlib.Path) -> None:
         return
     filename = file_path.name
 
+    release = _get_release(tag)
+    if release is None:
+        raise RuntimeError(f"release {tag} does not exist")
+
     # 同名アセットが既に存在する場合は削除（上書き対応）
-    try:
-        _run_gh([
-            "release", "delete-asset", tag, filename,
-            "--yes", "--repo", config.GITHUB_REPO,
-        ])
-    except RuntimeError:
-        pass  # アセットが存在しない場合は無視
+    for asset in release.get("assets", []):
+        if asset["name"] == filename:
+            _request(
+                "DELETE",
+                f"{_API_BASE}/repos/{config.GITHUB_REPO}/releases/assets/{asset['id']}",
+            )
+            break
 
     try:
-        _run_gh([
-            "release", "upload", tag, str(file_path),
-            "--repo", config.GITHUB_REPO,
-        ])
+        _request(
+            "POST",
+            f"{_UPLOADS_BASE}/repos/{config.GITHUB_REPO}"
+            f"/releases/{release['id']}/assets",
+            params={"name": filename},
+            headers={"Content-Type": "application/octet-stream"},
+            data=file_path.read_bytes(),
+        )
         logger.info("[upload] %s -> %s", filename, tag)
     except RuntimeError as exc:
         logger.error("[upload] failed %s: %s", filename, exc)
@@ -7,7 +7,7 @@ cog_translate は mock でバイパスし、rio への依存は最小限にす
 
 検証項目:
   - save_cog: 出力パス構造、一時ファイルの削除
-  - update_summary: CSV/JSON 作成、統計値の正確性、upsert、ソート順
+  - update_summary + flush_summary: CSV/JSON 作成、統計値の正確性、upsert、ソート順
 """
 
 import json
@@ -110,8 +110,9 @@ class TestUpdateSummary:
         monkeypatch.setattr(cfg, "OUTPUT_DIR", str(tmp_path))
 
         da = _make_da([[0.5, 0.6], [0.7, 0.8]])
-        from pipeline.export import update_summary
+        from pipeline.export import flush_summary, update_summary
         update_summary(da, "ndvi", 2023, 7)
+        flush_summary("ndvi")
 
         csv_path = tmp_path / "summary_ndvi.csv"
         assert csv_path.exists()
@@ -128,8 +129,9 @@ class TestUpdateSummary:
 
         values = [[0.2, 0.4], [0.6, 0.8]]
         da = _make_da(values)
-        from pipeline.export import update_summary
+        from pipeline.export import flush_summary, update_summary
         update_summary(da, "ndwi", 2023, 7)
+        flush_summary("ndwi")
 
         df = pd.read_csv(tmp_path / "summary_ndwi.csv")
         row = df.iloc[0]
@@ -149,8 +151,9 @@ class TestUpdateSummary:
         y = np.array([0.0, -10.0])
         da = xr.DataArray(values, dims=["y", "x"], coords={"x": x, "y": y})
 
-        from pipeline.export import update_summary
+        from pipeline.export import flush_summary, update_summary
         update_summary(da, "ndvi", 2023, 8)
+        flush_summary("ndvi")
 
         df = pd.read_csv(tmp_path / "summary_ndvi.csv")
         # 4ピクセル中3ピクセルが有効 → 0.75
@@ -163,9 +166,10 @@ class TestUpdateSummary:
 
         da1 = _make_da([[0.3, 0.4]])
         da2 = _make_da([[0.8, 0.9]])
-        from pipeline.export import update_summary
+        from pipeline.export import flush_summary, update_summary
         update_summary(da1, "evi", 2023, 7)
         update_summary(da2, "evi", 2023, 7)
+        flush_summary("evi")
 
         df = pd.read_csv(tmp_path / "summary_evi.csv")
         assert len(df) == 1, "upsert で行が重複した"
@@ -178,10 +182,11 @@ class TestUpdateSummary:
         monkeypatch.setattr(cfg, "OUTPUT_DIR", str(tmp_path))
 
         da = _make_da([[0.5, 0.6]])
-        from pipeline.export import update_summary
+        from pipeline.export import flush_summary, update_summary
         update_summary(da, "lst", 2023, 12)
         update_summary(da, "lst", 2023, 1)
         update_summary(da, "lst", 2022, 6)
+        flush_summary("lst")
 
         df = pd.read_csv(tmp_path / "summary_lst.csv")
         assert list(df["year"])  == [2022, 2023, 2023]
@@ -193,8 +198,9 @@ class TestUpdateSummary:
         monkeypatch.setattr(cfg, "OUTPUT_DIR", str(tmp_path))
 
         da = _make_da([[0.6, 0.7]])
-        from pipeline.export import update_summary
+        from pipeline.export import flush_summary, update_summary
         update_summary(da, "ndvi", 2023, 7)
+        flush_summary("ndvi")
 
         json_path = tmp_path / "summary_ndvi.json"
         assert json_path.exists()
@@ -207,15 +213,32 @@ class TestUpdateSummary:
         assert "mean" in records[0]
         assert "valid_ratio" in records[0]
 
+    def test_jsonl_appended_before_flush(self, tmp_path, monkeypatch):
+        """update_summary は JSONL 追記のみで、CSV/JSON は flush まで書かれないこと。"""
+        import pipeline.config as cfg
+        monkeypatch.setattr(cfg, "OUTPUT_DIR", str(tmp_path))
+
+        da = _make_da([[0.5, 0.6]])
+        from pipeline.export import flush_summary, update_summary
+        update_summary(da, "ndvi", 2023, 7)
+
+        assert (tmp_path / "summary_ndvi.jsonl").exists()
+        assert not (tmp_path / "summary_ndvi.csv").exists()
+
+        flush_summary("ndvi")
+        assert (tmp_path / "summary_ndvi.csv").exists()
+        assert (tmp_path / "summary_ndvi.json").exists()
+
     def test_multiple_months_accumulated(self, tmp_path, monkeypatch):
         """複数月を書き込んで行数が正しく蓄積されること。"""
         import pipeline.config as cfg
         monkeypatch.setattr(cfg, "OUTPUT_DIR", str(tmp_path))
 
         da = _make_da([[0.5]])
-        from pipeline.export import update_summary
+        from pipeline.export import flush_summary, update_summary
         for month in [1, 2, 3]:
             update_summary(da, "ndvi", 2023, month)
+        flush_summary("ndvi")
 
         df = pd.read_csv(tmp_path / "summary_ndvi.csv")
         assert len(df) == 3